@@ -11,10 +11,25 @@
 # Added info button in top-right corner with instructions pop-up window.
 # Updated: Moved info button to top-left, made it smaller, increased instructions window size.
 # Updated: Adjusted instructions window to 450x450 for better text fit, added note at bottom.
+# Updated: Refund rule now comes from refund_policies.json (policy in effect on the
+#          booking date) instead of being hard-coded here. Added Booking Date field.
 
+import math
+import os
 import tkinter as tk
 from tkinter import messagebox, Toplevel
-from datetime import datetime
+from datetime import date, datetime
+
+from refund_policy import load_policies
+
+# Load the refund policies kept next to this script
+POLICY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "refund_policies.json")
+try:
+    policies = load_policies(POLICY_FILE)
+    policy_error = None
+except (OSError, ValueError) as e:
+    policies = None
+    policy_error = str(e)
 
 # Initialize dark mode state
 is_dark_mode = False
@@ -45,7 +60,7 @@ def show_instructions():
     instructions_window.configure(bg=light_mode["bg"] if not is_dark_mode else dark_mode["bg"])
     
     # Set narrower window size to reduce extra space on the right
-    instructions_window.geometry("450x420")  # Changed from 500x450
+    instructions_window.geometry("450x480")  # Changed from 450x420 for the Booking Date step
     instructions_window.resizable(False, False)
     
     # Instructions text with added note at the bottom
@@ -65,7 +80,10 @@ def show_instructions():
         "  - Log into WeTravel\n"
         "  - Click “View Payment Plan”\n"
         "  - Find and enter the client’s deposit amount\n\n"
-        "Step 5: Calculate\n"
+        "Step 5: Booking Date\n"
+        "  - Enter the date the trip was booked as YYYY-MM-DD\n"
+        "  - The refund rule in effect on that date is used\n\n"
+        "Step 6: Calculate\n"
         "  - Click the “Calculate” button\n"
         "  - The refund amount will appear at the bottom\n\n"
     
@@ -105,38 +123,57 @@ def calculate():
         tpp = float(entry_tpp.get())
         deposit = float(entry_deposit.get())
 
-        # Check for negative values
+        # Check for negative values and "nan"/"inf", which float() accepts
+        if not all(math.isfinite(x) for x in (total_cost, amount_paid, tpp, deposit)):
+            raise ValueError("Values must be finite numbers")
         if total_cost < 0 or amount_paid < 0 or tpp < 0 or deposit < 0:
             raise ValueError("Negative values are not allowed")
-
-        # Perform calculations
-        twenty_percent = 0.20 * total_cost
-
-        tnr = tpp + twenty_percent
-        refund = max(amount_paid - tnr, 0)
-
-        # Format the output to match the original command-line version
-        result_text = "   === Calculation Summary ===\n"
-        result_text += f"       {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-        result_text += f"                \n"
-        result_text += f"   Total Package Cost   ${total_cost:.2f}\n"
-        result_text += f"   Amount Paid          ${amount_paid:.2f}\n"
-        result_text += f"   TPP                  ${tpp:.2f}\n"
-        result_text += f"   Deposit              ${deposit:.2f}\n"
-        result_text += f"   20% Package Cost     ${twenty_percent:.2f}\n"
-        result_text += "   ----------------------------\n"
-        result_text += f"   Total Non-Refundable ${tnr:.2f}\n"
-        result_text += "   ----------------------------\n"
-        result_text += f"   Refund Due           ${refund:.2f}\n"
-        if refund == 0:
-            result_text += "   No refund is due."
-
-        # Update the result label
-        label_result.config(text=result_text)
-
     except ValueError:
         # Show error message for invalid inputs
         messagebox.showerror("Error", "Please enter valid non-negative numbers.")
+        return
+
+    try:
+        booking_date = date.fromisoformat(entry_booking_date.get().strip())
+    except ValueError:
+        messagebox.showerror("Error", "Please enter the booking date as YYYY-MM-DD.")
+        return
+
+    # Pick the refund policy in effect on the booking date
+    if policies is None:
+        messagebox.showerror("Error", f"Could not load refund policies:\n{policy_error}")
+        return
+    try:
+        policy = policies.policy_for(booking_date)
+    except LookupError as e:
+        messagebox.showerror("Error", str(e))
+        return
+
+    # Perform calculations
+    kept_percentage = policy.kept_percentage(total_cost)
+    tnr = policy.non_refundable(total_cost, tpp, deposit)
+    refund = policy.refund(total_cost, amount_paid, tpp, deposit)
+
+    # Format the output to match the original command-line version
+    result_text = "   === Calculation Summary ===\n"
+    result_text += f"       {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+    result_text += f"                \n"
+    result_text += f"   Booking Date         {booking_date.isoformat()}\n"
+    result_text += f"   Policy               {policy.name}\n"
+    result_text += f"   Total Package Cost   ${total_cost:.2f}\n"
+    result_text += f"   Amount Paid          ${amount_paid:.2f}\n"
+    result_text += f"   TPP                  ${tpp:.2f}\n"
+    result_text += f"   Deposit              ${deposit:.2f}\n"
+    result_text += f"   Kept from Package    ${kept_percentage:.2f}\n"
+    result_text += "   ----------------------------\n"
+    result_text += f"   Total Non-Refundable ${tnr:.2f}\n"
+    result_text += "   ----------------------------\n"
+    result_text += f"   Refund Due           ${refund:.2f}\n"
+    if refund == 0:
+        result_text += "   No refund is due."
+
+    # Update the result label
+    label_result.config(text=result_text)
 
 # Function to toggle between light and dark modes
 def toggle_dark_mode():
@@ -163,6 +200,8 @@ def toggle_dark_mode():
     entry_amount_paid.configure(bg=colors["result_bg"], fg=colors["fg"])
     entry_tpp.configure(bg=colors["result_bg"], fg=colors["fg"])
     entry_deposit.configure(bg=colors["result_bg"], fg=colors["fg"])
+    label_booking_date.configure(bg=colors["bg"], fg=colors["fg"])
+    entry_booking_date.configure(bg=colors["result_bg"], fg=colors["fg"])
 
     # Update button text to reflect current mode
     button_toggle_mode.config(text="Light Mode" if is_dark_mode else "Dark Mode")
@@ -215,9 +254,14 @@ label_deposit.grid(row=3, column=0, sticky='e', padx=5, pady=5)
 entry_deposit = tk.Entry(main_frame, width=15, font=entry_font, bg=light_mode["result_bg"], fg=light_mode["fg"])
 entry_deposit.grid(row=3, column=1, padx=5, pady=5)
 
+label_booking_date = tk.Label(main_frame, text="Booking Date (YYYY-MM-DD):", font=label_font, bg=light_mode["bg"], fg=light_mode["fg"])
+label_booking_date.grid(row=4, column=0, sticky='e', padx=5, pady=5)
+entry_booking_date = tk.Entry(main_frame, width=15, font=entry_font, bg=light_mode["result_bg"], fg=light_mode["fg"])
+entry_booking_date.grid(row=4, column=1, padx=5, pady=5)
+
 # Create a frame for buttons
 button_frame = tk.Frame(main_frame, bg=light_mode["bg"])
-button_frame.grid(row=4, column=0, columnspan=2, pady=10)
+button_frame.grid(row=5, column=0, columnspan=2, pady=10)
 
 # Create the calculate button
 button_calculate = tk.Button(button_frame, text="Calculate", command=calculate, font=label_font, bg=light_mode["button_bg"], fg="white", width=10)
@@ -229,6 +273,7 @@ def clear_fields():
     entry_amount_paid.delete(0, tk.END)
     entry_tpp.delete(0, tk.END)
     entry_deposit.delete(0, tk.END)
+    entry_booking_date.delete(0, tk.END)
     label_result.config(text=" ")
     entry_total_cost.focus_set()
 
@@ -241,7 +286,7 @@ button_toggle_mode.grid(row=0, column=2, padx=5)
 
 # Create the result label without a border or fixed size
 label_result = tk.Label(main_frame, text=" ", font=result_font, justify="left", anchor="w", bg=light_mode["result_bg"], fg=light_mode["fg"])
-label_result.grid(row=5, column=0, columnspan=2, sticky='w', padx=5, pady=5)
+label_result.grid(row=6, column=0, columnspan=2, sticky='w', padx=5, pady=5)
 
 # Set initial focus to the first entry field
 entry_total_cost.focus_set()
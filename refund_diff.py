@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""Refund Float vs Decimal Check
+"""
+## Runs the same refund policy with float arithmetic (like Refund_calculator_v1.3.3.py)
+## and with Decimal ROUND_HALF_UP (like Refund_calculator_v1.3.py) on millions of
+## generated bookings and reports every booking where the refund shown to the
+## client ("$123.45") is different.
+
+# HOW TO RUN
+#   python refund_diff.py                          -> 10 million bookings, all CPU cores
+#   python refund_diff.py --count 1000000 --workers 4 --output diffs.csv
+#   python refund_diff.py --booking-date 2025-10-01   -> policy in effect on that date
+#   python refund_diff.py --policy "v1.3.3 20% only"  -> policy by name
+#
+# The policy comes from refund_policies.json, by default the one in effect today.
+#
+# Bookings are typed in the same way a person would type them into the GUI
+# (as text), then float() is used for the float path and Decimal() for the
+# Decimal path. Each batch is generated inside a worker process from
+# (seed, batch number), so a run can be repeated exactly with the same --seed.
+#
+# Kinds of generated bookings:
+#   realistic      - normal trips, whole cents
+#   half_cent      - amounts typed with a half cent (e.g. 123.455); the Decimal path rounds
+#                    them to the cent first, the float path uses them as typed
+#   pct_half_cent  - whole-cent totals whose percentage amount ends on exactly half a cent,
+#                    so only the percentage step rounds; skipped when the percentage can't
+#                    do that (20% of whole cents never ends on half a cent)
+#   huge           - totals from $1 billion up to $10 trillion, where floats run out of cents
+#   zero_boundary  - amount paid equal to the non-refundable total, give or take a cent
+
+import argparse
+import csv
+import os
+import random
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+from fractions import Fraction
+from multiprocessing import Pool
+
+from refund_policy import RefundPolicy, load_policies
+
+CATEGORIES = ("realistic", "half_cent", "pct_half_cent", "huge", "zero_boundary")
+
+_ONE_CENT = Decimal("0.01")
+_ZERO = Decimal("0.00")
+
+# Set in each worker by _init_worker
+_float_policy = None
+_decimal_policy = None
+_half_cent_totals = None  # (first total in cents, step) or None, see _init_worker
+
+
+def _cents(value):
+    # 12345 -> "123.45"
+    return f"{value // 100}.{value % 100:02d}"
+
+
+def _mills(value):
+    # 123455 -> "123.455"
+    return f"{value // 1000}.{value % 1000:03d}"
+
+
+def _realistic(rng):
+    total = rng.randint(50_000, 2_000_000)
+    tpp = rng.randint(0, total // 10)
+    deposit = rng.randint(0, total // 2)
+    paid = rng.randint(deposit, total + tpp)
+    return _cents(total), _cents(paid), _cents(tpp), _cents(deposit)
+
+
+def _half_cent(rng):
+    # Every amount ends in 5 mills, so the Decimal path rounds each one up to the
+    # next cent before doing anything else. Differences here come from that input
+    # rounding, not from the percentage step
+    total = rng.randint(1_000, 2_000_000) * 50 + 25
+    tpp = rng.randint(0, total // 10000) * 10 + 5
+    deposit = rng.randint(0, total // 2000) * 10 + 5
+    paid = rng.randint(0, (total + tpp) // 10) * 10 + 5
+    return _mills(total), _mills(paid), _mills(tpp), _mills(deposit)
+
+
+def _pct_half_cent(rng):
+    first, step = _half_cent_totals
+    # Stay around $500 - $20,000 unless the step is too big for that
+    top = max(2_000_000 // step, 1)
+    total = first + step * rng.randint(min(max(50_000 - first, 0) // step, top), top)
+    tpp = rng.randint(0, total // 10)
+    deposit = rng.randint(0, total // 2)
+    paid = rng.randint(deposit, total + tpp)
+    return _cents(total), _cents(paid), _cents(tpp), _cents(deposit)
+
+
+def _huge(rng):
+    total = rng.randint(10**11, 10**15)
+    tpp = rng.randint(0, total // 10)
+    deposit = rng.randint(0, total // 2)
+    paid = rng.randint(deposit, total + tpp)
+    return _cents(total), _cents(paid), _cents(tpp), _cents(deposit)
+
+
+def _zero_boundary(rng):
+    total = rng.randint(50_000, 2_000_000)
+    tpp = rng.randint(0, total // 10)
+    deposit = rng.randint(0, total // 2)
+    total, tpp, deposit = _cents(total), _cents(tpp), _cents(deposit)
+    # Same Decimal constants and ROUND_HALF_UP steps as the Decimal path
+    kept = _decimal_policy.non_refundable(total, tpp, deposit)
+    paid = max(kept + rng.randint(-1, 1) * _ONE_CENT, _ZERO)
+    return total, f"{paid:.2f}", tpp, deposit
+
+
+_GENERATORS = (_realistic, _half_cent, _pct_half_cent, _huge, _zero_boundary)
+
+
+def _find_half_cent_totals(percentage):
+    """Return (first, step) so that every total of first + k * step cents times
+    percentage ends on exactly half a cent, or None if no whole-cent total does"""
+    # total * n / d cents is a half cent when 2 * total * n = d (mod 2d)
+    fraction = Fraction(Decimal(str(percentage)))
+    n, d = fraction.numerator, fraction.denominator
+    if n == 0 or d % 2:
+        return None
+    return (d // 2) * pow(n, -1, d) % d, d
+
+
+def _init_worker(spec):
+    global _float_policy, _decimal_policy, _half_cent_totals
+    _float_policy = RefundPolicy(dict(spec, arithmetic="float"))
+    _decimal_policy = RefundPolicy(dict(spec, arithmetic="decimal"))
+    _half_cent_totals = _find_half_cent_totals(_decimal_policy.spec["percentage"])
+
+
+def run_batch(job):
+    """Check one batch and return (index, checked per category, disagreement rows)"""
+    index, seed, size = job
+    rng = random.Random(f"{seed}-{index}")
+
+    # Split the batch over the categories this policy can reach
+    active = [category for category, generate in enumerate(_GENERATORS)
+              if generate is not _pct_half_cent or _half_cent_totals is not None]
+    checked = [0] * len(CATEGORIES)
+    rows = []
+    for i, category in enumerate(active):
+        n = size // len(active) + (1 if i < size % len(active) else 0)
+        bookings = [_GENERATORS[category](rng) for _ in range(n)]
+        checked[category] = n
+        if not n:
+            continue
+        columns = list(zip(*bookings))
+        float_refunds = _float_policy.refund_batch(*(map(float, column) for column in columns))
+        decimal_refunds = _decimal_policy.refund_batch(*columns)
+        for booking, float_refund, decimal_refund in zip(bookings, float_refunds, decimal_refunds):
+            shown_float = f"{float_refund:.2f}"
+            shown_decimal = f"{decimal_refund:.2f}"
+            if shown_float != shown_decimal:
+                rows.append((CATEGORIES[category], *booking, shown_float, shown_decimal))
+    return index, checked, rows
+
+
+def _load_spec(path, name, booking_date):
+    policies = load_policies(path)
+    policy = policies.policy_for(booking_date) if name is None else policies[name]
+    return dict(policy.spec, effective_from=policy.effective_from.isoformat())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare float and Decimal refund calculations.")
+    parser.add_argument("--count", type=int, default=10_000_000, help="number of bookings to check")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="bookings per worker job")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="seed for repeatable runs")
+    parser.add_argument("--policies", default="refund_policies.json", help="policy config file")
+    parser.add_argument("--policy", help="policy name from the config")
+    parser.add_argument("--booking-date", default=date.today().isoformat(),
+                        help="use the policy in effect on this date (default: today)")
+    parser.add_argument("--output", default="refund_diff.csv", help="CSV file for every disagreement")
+    args = parser.parse_args(argv)
+
+    if args.count < 1 or args.batch_size < 1 or args.workers < 1:
+        parser.error("--count, --batch-size and --workers must be at least 1")
+
+    try:
+        spec = _load_spec(args.policies, args.policy, args.booking_date)
+    except (OSError, KeyError, LookupError, ValueError) as e:
+        parser.error(f"could not load policy: {e}")
+
+    jobs = [
+        (index, args.seed, min(args.batch_size, args.count - start))
+        for index, start in enumerate(range(0, args.count, args.batch_size))
+    ]
+
+    checked = [0] * len(CATEGORIES)
+    float_higher = [0] * len(CATEGORIES)
+    float_lower = [0] * len(CATEGORIES)
+    largest = [Decimal(0)] * len(CATEGORIES)
+    started = time.perf_counter()
+    done = 0
+
+    print(f"Checking {args.count:,} bookings with policy {spec['name']!r} "
+          f"on {args.workers} worker(s)...", file=sys.stderr)
+    with open(args.output, "w", newline="", encoding="utf-8") as f, \
+            Pool(args.workers, initializer=_init_worker, initargs=(spec,)) as pool:
+        writer = csv.writer(f)
+        writer.writerow(["category", "total_cost", "amount_paid", "tpp", "deposit",
+                         "float_refund", "decimal_refund"])
+        for _, batch_checked, rows in pool.imap_unordered(run_batch, jobs):
+            writer.writerows(rows)
+            for row in rows:
+                category = CATEGORIES.index(row[0])
+                difference = Decimal(row[5]) - Decimal(row[6])
+                if difference > 0:
+                    float_higher[category] += 1
+                else:
+                    float_lower[category] += 1
+                largest[category] = max(largest[category], abs(difference))
+            for category, n in enumerate(batch_checked):
+                checked[category] += n
+            done += sum(batch_checked)
+            elapsed = time.perf_counter() - started
+            print(f"\r  {done:,} / {args.count:,} checked ({done / elapsed:,.0f}/s)",
+                  end="", file=sys.stderr, flush=True)
+    elapsed = time.perf_counter() - started
+    print(file=sys.stderr)
+
+    print(f"{'Category':<15}{'Checked':>13}{'Differ':>11}{'Float >':>11}{'Float <':>11}{'Largest':>16}")
+    print("-" * 77)
+    for category, label in enumerate(CATEGORIES):
+        differ = float_higher[category] + float_lower[category]
+        print(f"{label:<15}{checked[category]:>13,}{differ:>11,}{float_higher[category]:>11,}"
+              f"{float_lower[category]:>11,}{'$' + format(largest[category], ',.2f'):>16}")
+    print("-" * 77)
+    total_differ = sum(float_higher) + sum(float_lower)
+    print(f"{'Total':<15}{sum(checked):>13,}{total_differ:>11,}{sum(float_higher):>11,}"
+          f"{sum(float_lower):>11,}")
+    if _find_half_cent_totals(spec["percentage"]) is None:
+        print(f"pct_half_cent skipped: {spec['percentage']:.2%} of a whole-cent total never ends "
+              f"on half a cent.")
+    print(f"Finished in {elapsed:.1f}s. Disagreements written to {args.output}")
+    return 1 if total_differ else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
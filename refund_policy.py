@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""Refund Policies
+"""
+## Refund policy rules loaded from a config file instead of being
+## hard-coded into each GUI script.
+
+# HOW IT WORKS
+# Each policy in refund_policies.json describes the non-refundable rule:
+#   percentage      - share of the total trip booking cost that is kept (0.20 = 20%)
+#   floor / cap     - optional minimum / maximum for that kept amount
+#   deposit         - "greater" keeps max(deposit, percentage amount) (v1.01 - v1.3.2, v1.3)
+#                     "ignore" keeps only the percentage amount (v1.3.3)
+#   tpp             - "non_refundable" adds the TPP to the kept amount,
+#                     "refundable" leaves it out
+#   arithmetic      - "float" (v1.3.3) or "decimal" with ROUND_HALF_UP to the cent (v1.3)
+#   effective_from  - first booking date (YYYY-MM-DD) the policy applies to; leave it
+#                     out for a policy that covers every booking before the next one
+#
+# Every policy is compiled ONCE when the file is loaded into plain Python
+# functions with the numbers written straight into the code, so calling them
+# costs the same as the hand-written calculation in the GUI scripts:
+#   policy.kept_percentage(total_cost)                            -> percentage amount after floor/cap
+#   policy.non_refundable(total_cost, tpp, deposit)               -> total non-refundable
+#   policy.refund(total_cost, amount_paid, tpp, deposit)          -> refund due
+#   policy.refund_batch(total_costs, amounts_paid, tpps, deposits) -> list of refunds
+# Decimal policies read every amount through str() first, so pass the text the
+# user typed (or a Decimal); a float is read as its shortest text ("2.675").
+# The policy for a booking is picked by date with a binary search over the
+# sorted effective_from dates.
+
+import json
+from bisect import bisect_right
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+
+DEPOSIT_MODES = ("greater", "ignore")
+TPP_MODES = ("non_refundable", "refundable")
+ARITHMETIC_MODES = ("float", "decimal")
+
+# Argument names shared by the generated scalar and batch functions
+_ARGS = ("total_cost", "amount_paid", "tpp", "deposit")
+
+
+def _float_body(spec, args, percentage_only=False):
+    # Same order of operations as the float GUI scripts so results match bit for bit
+    lines = [f"kept = {spec['percentage']!r} * total_cost"]
+    if spec["floor"] is not None:
+        lines.append(f"kept = max(kept, {spec['floor']!r})")
+    if spec["cap"] is not None:
+        lines.append(f"kept = min(kept, {spec['cap']!r})")
+    if percentage_only:
+        return lines, None
+    if spec["deposit"] == "greater":
+        lines.append("kept = max(deposit, kept)")
+    if spec["tpp"] == "non_refundable":
+        lines.append("kept = tpp + kept")
+    result = "max(amount_paid - kept, 0.0)"
+    return lines, result
+
+
+def _decimal_body(spec, args, percentage_only=False):
+    # Same quantize steps as Refund_calculator_v1.3.py. str() first so a float
+    # 2.675 is read as the text "2.675" (like the GUI entry), not its binary value
+    q = ".quantize(_CENT, ROUND_HALF_UP)"
+    lines = [f"{name} = Decimal(str({name})){q}" for name in args]
+    lines.append(f"kept = (total_cost * _PERCENTAGE){q}")
+    if spec["floor"] is not None:
+        lines.append("kept = max(kept, _FLOOR)")
+    if spec["cap"] is not None:
+        lines.append("kept = min(kept, _CAP)")
+    if percentage_only:
+        return lines, None
+    if spec["deposit"] == "greater":
+        lines.append("kept = max(deposit, kept)")
+    if spec["tpp"] == "non_refundable":
+        lines.append(f"kept = (tpp + kept){q}")
+    result = f"max(_ZERO, (amount_paid - kept)){q}"
+    return lines, result
+
+
+def _generate_source(spec):
+    body = _decimal_body if spec["arithmetic"] == "decimal" else _float_body
+    lines, _ = body(spec, ("total_cost",), percentage_only=True)
+    source = ["def kept_percentage(total_cost):"]
+    source += [f"    {line}" for line in lines]
+    source.append("    return kept")
+    source.append("")
+
+    kept_args = ("total_cost", "tpp", "deposit")
+    lines, _ = body(spec, kept_args)
+    source.append(f"def non_refundable({', '.join(kept_args)}):")
+    source += [f"    {line}" for line in lines]
+    source.append("    return kept")
+    source.append("")
+
+    lines, result = body(spec, _ARGS)
+    args = ", ".join(_ARGS)
+    source.append(f"def refund({args}):")
+    source += [f"    {line}" for line in lines]
+    source.append(f"    return {result}")
+    source.append("")
+    source.append("def refund_batch(total_costs, amounts_paid, tpps, deposits):")
+    source.append("    out = []")
+    source.append("    append = out.append")
+    source.append(f"    for {args} in zip(total_costs, amounts_paid, tpps, deposits):")
+    source += [f"        {line}" for line in lines]
+    source.append(f"        append({result})")
+    source.append("    return out")
+    return "\n".join(source) + "\n"
+
+
+def _as_decimal(value):
+    # str() first so 0.2 from JSON becomes Decimal('0.2'), not its binary expansion
+    return Decimal(str(value)).quantize(Decimal(".01"), rounding=ROUND_HALF_UP)
+
+
+def _check_spec(raw):
+    """Validate one policy entry and fill in defaults"""
+    if not isinstance(raw, dict):
+        raise ValueError(f"Every refund policy must be a JSON object, not {raw!r}.")
+    name = raw.get("name")
+    if not name or not isinstance(name, str):
+        raise ValueError(f"Every refund policy needs a name (text), not {name!r}.")
+
+    def fail(message):
+        raise ValueError(f"Refund policy {name!r}: {message}")
+
+    unknown = set(raw) - {"name", "effective_from", "percentage", "floor", "cap",
+                          "deposit", "tpp", "arithmetic"}
+    if unknown:
+        fail(f"unknown field(s) {', '.join(sorted(unknown))}")
+
+    # No effective_from means the policy covers every booking date before the next one
+    try:
+        effective_from = date.fromisoformat(raw.get("effective_from", date.min.isoformat()))
+    except (TypeError, ValueError):
+        fail("effective_from must be a date like 2025-01-31.")
+
+    spec = {
+        "name": name,
+        "effective_from": effective_from,
+        "deposit": raw.get("deposit", "greater"),
+        "tpp": raw.get("tpp", "non_refundable"),
+        "arithmetic": raw.get("arithmetic", "float"),
+    }
+    if spec["deposit"] not in DEPOSIT_MODES:
+        fail(f"deposit must be one of {', '.join(DEPOSIT_MODES)}.")
+    if spec["tpp"] not in TPP_MODES:
+        fail(f"tpp must be one of {', '.join(TPP_MODES)}.")
+    if spec["arithmetic"] not in ARITHMETIC_MODES:
+        fail(f"arithmetic must be one of {', '.join(ARITHMETIC_MODES)}.")
+
+    for key in ("percentage", "floor", "cap"):
+        value = raw.get(key)
+        if value is None:
+            if key == "percentage":
+                fail("percentage is required.")
+            spec[key] = None
+            continue
+        if isinstance(value, bool):
+            fail(f"{key} must be a number.")
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            fail(f"{key} must be a number.")
+        if not 0 <= value < float("inf"):
+            fail(f"{key} must be a non-negative number.")
+        spec[key] = value
+    if spec["percentage"] > 1:
+        fail("percentage is a fraction of the total cost (0.20 = 20%).")
+    if spec["floor"] is not None and spec["cap"] is not None and spec["floor"] > spec["cap"]:
+        fail("floor cannot be larger than cap.")
+    return spec
+
+
+class RefundPolicy:
+    """One refund rule, compiled into kept_percentage(), non_refundable(), refund() and refund_batch()"""
+
+    def __init__(self, spec):
+        spec = _check_spec(spec)
+        self.name = spec["name"]
+        self.effective_from = spec["effective_from"]
+        self.spec = spec
+        self.source = _generate_source(spec)
+
+        namespace = {
+            "Decimal": Decimal,
+            "ROUND_HALF_UP": ROUND_HALF_UP,
+            "_CENT": Decimal(".01"),
+            "_ZERO": Decimal("0.00"),
+        }
+        if spec["arithmetic"] == "decimal":
+            namespace["_PERCENTAGE"] = Decimal(str(spec["percentage"]))
+            if spec["floor"] is not None:
+                namespace["_FLOOR"] = _as_decimal(spec["floor"])
+            if spec["cap"] is not None:
+                namespace["_CAP"] = _as_decimal(spec["cap"])
+        exec(compile(self.source, f"<refund policy {self.name}>", "exec"), namespace)
+        self.kept_percentage = namespace["kept_percentage"]
+        self.non_refundable = namespace["non_refundable"]
+        self.refund = namespace["refund"]
+        self.refund_batch = namespace["refund_batch"]
+
+    def __repr__(self):
+        return f"RefundPolicy({self.name!r}, effective_from={self.effective_from.isoformat()})"
+
+
+class PolicySet:
+    """All loaded policies, looked up by booking date"""
+
+    def __init__(self, policies):
+        self.policies = sorted(policies, key=lambda policy: policy.effective_from)
+        self._dates = [policy.effective_from for policy in self.policies]
+        self._by_name = {}
+        for policy in self.policies:
+            if policy.name in self._by_name:
+                raise ValueError(f"Refund policy {policy.name!r} is defined twice.")
+            self._by_name[policy.name] = policy
+        for earlier, later in zip(self.policies, self.policies[1:]):
+            if earlier.effective_from == later.effective_from:
+                starts = ("have no effective_from" if later.effective_from == date.min
+                          else f"both start on {later.effective_from.isoformat()}")
+                raise ValueError(f"Refund policies {earlier.name!r} and {later.name!r} {starts}.")
+
+    def __len__(self):
+        return len(self.policies)
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def policy_for(self, booking_date):
+        """Return the policy in effect on booking_date (a date or YYYY-MM-DD string)"""
+        if isinstance(booking_date, str):
+            booking_date = date.fromisoformat(booking_date)
+        index = bisect_right(self._dates, booking_date) - 1
+        if index < 0:
+            raise LookupError(f"No refund policy is in effect on {booking_date.isoformat()}.")
+        return self.policies[index]
+
+    def refund(self, booking_date, total_cost, amount_paid, tpp, deposit):
+        return self.policy_for(booking_date).refund(total_cost, amount_paid, tpp, deposit)
+
+
+def parse_policies(config):
+    """Build a PolicySet from already-parsed config ({"policies": [...]})"""
+    entries = config.get("policies") if isinstance(config, dict) else None
+    if not isinstance(entries, list):
+        raise ValueError('Refund policy config must look like {"policies": [...]}.')
+    return PolicySet(RefundPolicy(entry) for entry in entries)
+
+
+def load_policies(path="refund_policies.json"):
+    """Load and compile every policy in a JSON config file"""
+    with open(path, encoding="utf-8") as f:
+        return parse_policies(json.load(f))
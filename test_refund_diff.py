@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Checks for the float vs Decimal harness, run in-process without a Pool
+"""
+
+import random
+from decimal import Decimal
+
+import pytest
+
+import refund_diff
+
+# Same rule as the shipped refund_policies.json
+SPEC = {"name": "20% only", "percentage": 0.20, "deposit": "ignore", "tpp": "non_refundable"}
+ODD_SPEC = {"name": "12.5% with floor", "percentage": 0.125, "floor": 100.005, "deposit": "greater"}
+
+
+def test_same_seed_same_rows():
+    refund_diff._init_worker(SPEC)
+    assert refund_diff.run_batch((0, 7, 2000)) == refund_diff.run_batch((0, 7, 2000))
+    assert refund_diff.run_batch((0, 7, 2000)) != refund_diff.run_batch((1, 7, 2000))
+
+
+@pytest.mark.parametrize("spec", [SPEC, ODD_SPEC])
+def test_rows_are_real_disagreements(spec):
+    refund_diff._init_worker(spec)
+    index, checked, rows = refund_diff.run_batch((3, 11, 2000))
+    assert index == 3
+    assert sum(checked) == 2000
+    assert rows
+    for category, *booking, shown_float, shown_decimal in rows:
+        assert category in refund_diff.CATEGORIES
+        float_refund = refund_diff._float_policy.refund(*(float(x) for x in booking))
+        decimal_refund = refund_diff._decimal_policy.refund(*booking)
+        assert (shown_float, shown_decimal) == (f"{float_refund:.2f}", f"{decimal_refund:.2f}")
+        assert shown_float != shown_decimal
+
+
+def test_half_cent_input_rounding_makes_float_higher():
+    # v1.3 rounds 123.455 up before using it, so its refund comes out a cent lower
+    refund_diff._init_worker(SPEC)
+    _, _, rows = refund_diff.run_batch((0, 0, 2000))
+    half_cent = [row for row in rows if row[0] == "half_cent"]
+    assert half_cent
+    assert all(Decimal(row[5]) - Decimal(row[6]) == Decimal("0.01") for row in half_cent)
+
+
+@pytest.mark.parametrize("spec", [SPEC, ODD_SPEC])
+def test_zero_boundary_within_a_cent(spec):
+    refund_diff._init_worker(spec)
+    rng = random.Random(5)
+    for _ in range(500):
+        total, paid, tpp, deposit = refund_diff._zero_boundary(rng)
+        kept = refund_diff._decimal_policy.non_refundable(total, tpp, deposit)
+        assert abs(Decimal(paid) - kept) <= Decimal("0.01") or Decimal(paid) == 0
+
+
+def test_pct_half_cent_lands_on_half_a_cent():
+    refund_diff._init_worker(ODD_SPEC)
+    rng = random.Random(5)
+    for _ in range(500):
+        total = Decimal(refund_diff._pct_half_cent(rng)[0])
+        assert (total * Decimal("0.125") * 1000) % 10 == 5
+
+
+def test_pct_half_cent_skipped_for_twenty_percent():
+    refund_diff._init_worker(SPEC)
+    _, checked, _ = refund_diff.run_batch((0, 0, 1000))
+    assert checked[refund_diff.CATEGORIES.index("pct_half_cent")] == 0
+    assert sum(checked) == 1000
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""Checks that refund_policies.json matches the hand-written GUI calculations
+"""
+
+import os
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+
+import pytest
+
+from refund_policy import load_policies, parse_policies
+
+# (total_cost, amount_paid, tpp, deposit) as typed into the GUI
+BOOKINGS = [
+    ("1000", "800", "50", "100"),
+    ("1000", "800", "50", "300"),
+    ("2500.50", "2500.50", "125.25", "500"),
+    ("2.675", "10", "0", "0"),
+    ("1234.565", "300", "12.345", "0.005"),
+    ("0", "0", "0", "0"),
+    ("5000", "100", "250", "1000"),
+]
+
+
+def v1_01(total_cost, amount_paid, tpp, deposit):
+    # Refund_calculator_v1.01.py
+    total_cost, amount_paid, tpp, deposit = map(float, (total_cost, amount_paid, tpp, deposit))
+    twenty_percent = 0.20 * total_cost
+    if deposit >= twenty_percent:
+        tnr = tpp + deposit
+    else:
+        tnr = tpp + twenty_percent
+    return max(amount_paid - tnr, 0)
+
+
+def v1_3(total_cost, amount_paid, tpp, deposit):
+    # Refund_calculator_v1.3.py
+    cent = Decimal(".01")
+    total_cost, total_paid, tpp, deposit = (
+        Decimal(x).quantize(cent, rounding=ROUND_HALF_UP)
+        for x in (total_cost, amount_paid, tpp, deposit)
+    )
+    twenty_percent = (total_cost * Decimal("0.20")).quantize(cent, rounding=ROUND_HALF_UP)
+    greater_non_refundable = max(deposit, twenty_percent)
+    non_refundable = (tpp + greater_non_refundable).quantize(cent, rounding=ROUND_HALF_UP)
+    return max(Decimal("0.00"), (total_paid - non_refundable)).quantize(cent, rounding=ROUND_HALF_UP)
+
+
+def v1_3_3(total_cost, amount_paid, tpp, deposit):
+    # Refund_calculator_v1.3.3.py (before it read refund_policies.json)
+    total_cost, amount_paid, tpp, deposit = map(float, (total_cost, amount_paid, tpp, deposit))
+    twenty_percent = 0.20 * total_cost
+    tnr = tpp + twenty_percent
+    return max(amount_paid - tnr, 0)
+
+
+# Every rule the GUI scripts have used; the dates here are only for the tests
+HISTORY = {"policies": [
+    {"name": "v1.01 deposit or 20%", "effective_from": "2025-01-01",
+     "percentage": 0.20, "deposit": "greater"},
+    {"name": "v1.3 deposit or 20% (Decimal)", "effective_from": "2025-06-01",
+     "percentage": 0.20, "deposit": "greater", "arithmetic": "decimal"},
+    {"name": "v1.3.3 20% only", "effective_from": "2025-09-01",
+     "percentage": 0.20, "deposit": "ignore"},
+]}
+
+
+@pytest.fixture(scope="module")
+def policies():
+    return parse_policies(HISTORY)
+
+
+def test_shipped_config_is_v1_3_3():
+    shipped = load_policies(os.path.join(os.path.dirname(os.path.abspath(__file__)), "refund_policies.json"))
+    for booking_date in ("2000-01-01", "2025-09-01", "2030-01-01"):
+        policy = shipped.policy_for(booking_date)
+        for booking in BOOKINGS:
+            assert policy.refund(*(float(x) for x in booking)) == v1_3_3(*booking), booking
+
+
+@pytest.mark.parametrize("name, formula, as_float", [
+    ("v1.01 deposit or 20%", v1_01, True),
+    ("v1.3 deposit or 20% (Decimal)", v1_3, False),
+    ("v1.3.3 20% only", v1_3_3, True),
+])
+def test_policies_match_gui(policies, name, formula, as_float):
+    policy = policies[name]
+    for booking in BOOKINGS:
+        expected = formula(*booking)
+        args = [float(x) for x in booking] if as_float else booking
+        assert policy.refund(*args) == expected, booking
+        assert policy.refund_batch(*([x] for x in args)) == [expected], booking
+
+
+def test_decimal_policy_reads_floats_as_typed(policies):
+    policy = policies["v1.3 deposit or 20% (Decimal)"]
+    for booking in BOOKINGS:
+        assert policy.refund(*(float(x) for x in booking)) == v1_3(*booking), booking
+
+
+def test_policy_for_dates(policies):
+    with pytest.raises(LookupError):
+        policies.policy_for("2024-12-31")
+    assert policies.policy_for("2025-06-01").name == "v1.3 deposit or 20% (Decimal)"
+    assert policies.policy_for(date(2025, 5, 31)).name == "v1.01 deposit or 20%"
+    assert policies.policy_for("2030-01-01").name == "v1.3.3 20% only"
+
+
+def test_undated_policy_covers_earlier_bookings():
+    undated = parse_policies({"policies": [
+        {"name": "old", "percentage": 0.2},
+        {"name": "new", "effective_from": "2025-01-01", "percentage": 0.1},
+    ]})
+    assert undated.policy_for("1999-12-31").name == "old"
+    assert undated.policy_for("2025-01-01").name == "new"
+
+
+@pytest.mark.parametrize("arithmetic", ["float", "decimal"])
+def test_kept_percentage_uses_floor_and_cap(arithmetic):
+    capped = parse_policies({"policies": [
+        {"name": "capped", "percentage": 0.2, "floor": 50, "cap": 100, "arithmetic": arithmetic},
+    ]})["capped"]
+    assert capped.kept_percentage(1000.0) == 100
+    assert capped.kept_percentage(100.0) == 50
+    assert capped.kept_percentage(400.0) == 80
+    assert capped.non_refundable(1000.0, 25.0, 0.0) == 125
+
+
+@pytest.mark.parametrize("entries", [
+    [{"name": "a", "effective_from": "2025-01-01", "percentage": 0.2},
+     {"name": "a", "effective_from": "2025-02-01", "percentage": 0.2}],
+    [{"name": "a", "effective_from": "2025-01-01", "percentage": 0.2},
+     {"name": "b", "effective_from": "2025-01-01", "percentage": 0.2}],
+    [{"name": "a", "percentage": 0.2}, {"name": "b", "percentage": 0.2}],
+])
+def test_duplicate_names_or_dates(entries):
+    with pytest.raises(ValueError):
+        parse_policies({"policies": entries})
+
+
+@pytest.mark.parametrize("entry", [
+    "oops",
+    {"name": "a", "effective_from": "2025-01-01", "percentage": True},
+    {"name": "a", "effective_from": "2025-01-01", "percentage": 0.2, "floor": False},
+    {"name": ["x"], "effective_from": "2025-01-01", "percentage": 0.2},
+    {"name": 7, "effective_from": "2025-01-01", "percentage": 0.2},
+])
+def test_bad_entries(entry):
+    with pytest.raises(ValueError):
+        parse_policies({"policies": [entry]})